@@ -1,3 +1,4 @@
+from typing import Literal
 from pydantic_settings import BaseSettings
 
 
@@ -7,9 +8,13 @@ class Settings(BaseSettings):
     db_password: str
     db_name: str
     db_user: str
+    db_driver: Literal["psycopg2", "psycopg"] = "psycopg2"
+    db_prepare_threshold: int | None = 5
+    db_count_round_trips: bool = False
     secret_key: str
     algorithm: str
     access_token_expire_minutes: int
+    singleflight_timeout: float = 5.0
 
     class Config:
         env_file = ".env"
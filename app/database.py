@@ -1,16 +1,49 @@
+from contextvars import ContextVar
+from sqlalchemy import event
 from sqlmodel import Session, create_engine
 from app.config import settings
 
 
+DB_SCHEMES = {
+    "psycopg2": "postgresql+psycopg2",
+    "psycopg": "postgresql+psycopg",
+}
 DATABASE_URL = (
-    f'postgresql://{settings.db_user}:{settings.db_password}@'
+    f'{DB_SCHEMES[settings.db_driver]}://'
+    f'{settings.db_user}:{settings.db_password}@'
     f'{settings.db_host}:{settings.db_port}/'
     f'{settings.db_name}'
 
 )
-engine = create_engine(DATABASE_URL, echo=True)
+connect_args = {}
+if settings.db_driver == "psycopg":
+    # psycopg3 switches a statement to a server-side prepared statement
+    # once a connection has run it this many times
+    connect_args["prepare_threshold"] = settings.db_prepare_threshold
+engine = create_engine(DATABASE_URL, echo=True, connect_args=connect_args)
 
 
 def get_session():
-    with Session(engine) as session:
+    # Objects stay loaded after commit, so write endpoints can return them
+    # without a refresh round trip
+    with Session(engine, expire_on_commit=False) as session:
         yield session
+
+
+# Per-request round-trip counter, set by the middleware in app.main when
+# settings.db_count_round_trips is enabled
+round_trips: ContextVar[list[int] | None] = ContextVar(
+    "round_trips", default=None)
+
+
+def _count_round_trip(*args, **kwargs):
+    counter = round_trips.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+if settings.db_count_round_trips:
+    event.listen(engine, "begin", _count_round_trip)
+    event.listen(engine, "before_cursor_execute", _count_round_trip)
+    event.listen(engine, "commit", _count_round_trip)
+    event.listen(engine, "rollback", _count_round_trip)
@@ -1,9 +1,10 @@
 from typing import Annotated
-from fastapi import Depends, FastAPI
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from sqlmodel import Session
-from app.database import get_session
-from app.routes import post, user, auth
+from app.config import settings
+from app.database import get_session, round_trips
+from app.routes import post, user, auth, stats
 from fastapi_pagination import add_pagination
 
 
@@ -18,6 +19,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+if settings.db_count_round_trips:
+    @app.middleware("http")
+    async def count_round_trips(request: Request, call_next):
+        counter = [0]
+        token = round_trips.set(counter)
+        try:
+            response = await call_next(request)
+        finally:
+            round_trips.reset(token)
+        response.headers["X-DB-Round-Trips"] = str(counter[0])
+        return response
+
 app.include_router(auth.router)
 app.include_router(user.router)
 app.include_router(post.router)
+app.include_router(stats.router)
@@ -1,5 +1,8 @@
 from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
 from sqlmodel import Session, col, select
 from app.models import (
     Post,
@@ -10,7 +13,8 @@ from app.models import (
 )
 from app.database import get_session
 from app.oauth2 import get_current_user
-from fastapi_pagination import Page, paginate
+from app.singleflight import coalesce
+from fastapi_pagination import Page, Params, paginate
 
 
 
@@ -25,37 +29,55 @@ def create_post(
     session: SessionDep,
     current_user: CurrentUserDep
 ):
-    post_db = Post(owner_id=current_user.id, **post.model_dump())
+    # A new post has no ratings; marking the collection as loaded keeps
+    # serialization from querying for them
+    post_db = Post(owner_id=current_user.id, ratings=[], **post.model_dump())
     session.add(post_db)
     session.commit()
-    session.refresh(post_db)
     return post_db
 
 
 @router.get("", response_model=Page[PostPublic])
-def get_posts(
+async def get_posts(
     session: SessionDep,
+    params: Annotated[Params, Depends()],
     limit: int = 10,
     offset: int = 0,
     search: str | None = ""
 ) -> Page[PostPublic]:
-    statement = select(Post)
+    def load() -> Page[PostPublic]:
+        statement = select(Post)
 
-    if search:
-        statement = statement.where(col(Post.title).contains(search))
+        if search:
+            statement = statement.where(col(Post.title).contains(search))
 
-    posts = session.exec(statement)
-    return paginate(list(posts))
+        posts = session.exec(statement)
+        # Serialize while the leader's session is still open, so the
+        # shared page does not lazy-load through a closed session
+        return paginate(
+            list(posts),
+            params,
+            transformer=lambda items: [
+                PostPublic.model_validate(p) for p in items
+            ])
+
+    # limit and offset do not affect the query, so they are not part of
+    # the key; a missing and an empty search are the same request
+    key = ("posts", search or "", params.page, params.size)
+    return await coalesce(key, load)
 
 
 @router.get("/{id}", response_model=PostPublic)
-def get_post(id: int, session: SessionDep):
-    post = session.get(Post, id)
-    if not post:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Post not found")
-    return post
+async def get_post(id: int, session: SessionDep):
+    def load() -> PostPublic:
+        post = session.get(Post, id)
+        if not post:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Post not found")
+        return PostPublic.model_validate(post)
+
+    return await coalesce(("post", id), load)
 
 
 @router.delete("/{id}", response_class=Response)
@@ -86,21 +108,28 @@ def update_post(
     updated_post: PostCreate,
     current_user: CurrentUserDep
 ):
-    post = session.get(Post, id)
+    update_data = updated_post.model_dump(exclude_unset=True)
+    statement = (
+        update(Post)
+        .where(col(Post.id) == id, col(Post.owner_id) == current_user.id)
+        .values(**update_data)
+        .returning(Post)
+    )
+    post = session.scalars(statement).first()
     if not post:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Post not found")
-    if post.owner_id != current_user.id:
+        # Nothing was updated, look the post up only to pick the error
+        if not session.get(Post, id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Post not found")
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to perform this action"
         )
-    update_data = updated_post.model_dump(exclude_unset=True)
-    post.sqlmodel_update(update_data)
-    session.add(post)
+    # Load the ratings inside this transaction, serializing after commit
+    # would lazy-load them in a new one
+    post.ratings
     session.commit()
-    session.refresh(post)
     return post
 
 
@@ -111,18 +140,33 @@ def rate_post(
     session: SessionDep,
     current_user: CurrentUserDep
 ):
-    post = session.get(Post, id)
-    if not post:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Post not found")
     if rating < 1 or rating > 5:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Rating must be between 1 and 5"
         )
-    post.ratings.append(Rating(user_id=current_user.id, rating=rating))
-    session.add(post)
+    session.add(Rating(post_id=id, user_id=current_user.id, rating=rating))
+    try:
+        session.flush()
+    except IntegrityError as e:
+        session.rollback()
+        if 'ratings_post_id_fkey' in str(e.orig):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Post not found")
+        elif 'ratings_pkey' in str(e.orig):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Post already rated"
+            )
+        else:
+            raise
+    # Load the post with its owner and ratings in a single query
+    statement = (
+        select(Post)
+        .where(Post.id == id)
+        .options(joinedload(Post.owner), joinedload(Post.ratings))
+    )
+    post = session.exec(statement).unique().one()
     session.commit()
-    session.refresh(post)
     return post
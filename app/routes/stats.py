@@ -0,0 +1,14 @@
+from typing import Annotated
+from fastapi import APIRouter, Depends
+from app.models import TokenData
+from app.oauth2 import get_current_user
+from app.singleflight import read_flight
+
+
+CurrentUserDep = Annotated[TokenData, Depends(get_current_user)]
+router = APIRouter(prefix="/stats", tags=["Stats"])
+
+
+@router.get("/singleflight")
+def singleflight_stats(current_user: CurrentUserDep) -> dict[str, int]:
+    return read_flight.stats()
@@ -4,6 +4,7 @@ from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session
 from app.models import User, UserCreate, UserPublic
 from app.database import get_session
+from app.singleflight import coalesce
 from app.utils import hash_password
 
 
@@ -29,15 +30,17 @@ def create_user(user: UserCreate, session: SessionDep):
         else:
             # Re-raise the exception if it's a different IntegrityError
             raise
-    session.refresh(new_user)
     return new_user
 
 
 @router.get("/{id}", response_model=UserPublic)
-def get_user(id: int, session: SessionDep):
-    user = session.get(User, id)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found")
-    return user
+async def get_user(id: int, session: SessionDep):
+    def load() -> UserPublic:
+        user = session.get(User, id)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found")
+        return UserPublic.model_validate(user)
+
+    return await coalesce(("user", id), load)
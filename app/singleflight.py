@@ -0,0 +1,98 @@
+import asyncio
+from typing import Any, Callable, Hashable, TypeVar
+from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
+from app.config import settings
+
+
+T = TypeVar("T")
+
+
+class SingleFlightTimeout(Exception):
+    pass
+
+
+class SingleFlightError(Exception):
+    pass
+
+
+class SingleFlight:
+    """Share one in-flight execution between identical concurrent calls.
+
+    The first caller for a key runs the function in the threadpool, every
+    caller arriving while it is still running awaits that result (or
+    exception) on the event loop instead of repeating the work. Waiting
+    does not hold a worker thread. Finished calls are not cached.
+    """
+
+    def __init__(self, timeout: float) -> None:
+        self.timeout = timeout
+        self._calls: dict[Hashable, asyncio.Future] = {}
+        self.executions = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.timeouts = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        call = self._calls.get(key)
+        if call is None:
+            return await self._lead(key, fn)
+
+        try:
+            result, error = await asyncio.wait_for(
+                asyncio.shield(call), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise SingleFlightTimeout(key)
+        self.coalesced += 1
+        if error is not None:
+            # Each follower raises its own exception, the leader's one
+            # must not collect tracebacks from every waiting request
+            if isinstance(error, HTTPException):
+                raise HTTPException(
+                    error.status_code, error.detail, error.headers)
+            raise SingleFlightError(
+                f"Shared call for {key!r} failed") from error
+        return result
+
+    async def _lead(self, key: Hashable, fn: Callable[[], T]) -> T:
+        # The outcome is stored as a (result, error) pair, so a failure
+        # nobody waited for is not reported as an unretrieved exception
+        call = asyncio.get_running_loop().create_future()
+        self._calls[key] = call
+        self.executions += 1
+        try:
+            result = await run_in_threadpool(fn)
+        except Exception as e:
+            self.errors += 1
+            call.set_result((None, e))
+            raise
+        else:
+            call.set_result((result, None))
+            return result
+        finally:
+            del self._calls[key]
+            if not call.done():
+                call.set_result(
+                    (None, SingleFlightError(f"Call for {key!r} cancelled")))
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "in_flight": len(self._calls),
+        }
+
+
+read_flight = SingleFlight(timeout=settings.singleflight_timeout)
+
+
+async def coalesce(key: Hashable, fn: Callable[[], Any]) -> Any:
+    try:
+        return await read_flight.do(key, fn)
+    except SingleFlightTimeout:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Timed out waiting for an identical request")
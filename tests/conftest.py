@@ -0,0 +1,15 @@
+import os
+
+
+# app.config reads these at import time
+for name, value in {
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_PASSWORD": "postgres",
+    "DB_NAME": "postgres",
+    "DB_USER": "postgres",
+    "SECRET_KEY": "secret",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+}.items():
+    os.environ.setdefault(name, value)
@@ -0,0 +1,151 @@
+import asyncio
+import threading
+import pytest
+from fastapi import HTTPException
+from app import singleflight
+from app.singleflight import SingleFlight, SingleFlightError, SingleFlightTimeout
+
+
+def blocking(release: threading.Event, fn):
+    calls = []
+
+    def run():
+        calls.append(1)
+        release.wait(5)
+        return fn()
+
+    return run, calls
+
+
+async def run_concurrently(flight, key, fn, release, count):
+    tasks = [
+        asyncio.create_task(flight.do(key, fn)) for _ in range(count)
+    ]
+    await asyncio.sleep(0.05)
+    release.set()
+    return await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def test_concurrent_calls_share_one_result():
+    flight = SingleFlight(timeout=5)
+    release = threading.Event()
+    fn, calls = blocking(release, object)
+
+    results = asyncio.run(run_concurrently(flight, "k", fn, release, 5))
+
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+    assert flight.stats() == {
+        "executions": 1,
+        "coalesced": 4,
+        "errors": 0,
+        "timeouts": 0,
+        "in_flight": 0,
+    }
+
+
+def test_different_keys_are_not_shared():
+    flight = SingleFlight(timeout=5)
+
+    async def main():
+        return await asyncio.gather(
+            flight.do("a", lambda: "a"), flight.do("b", lambda: "b"))
+
+    assert asyncio.run(main()) == ["a", "b"]
+    assert flight.executions == 2
+    assert flight.coalesced == 0
+
+
+def test_http_errors_are_raised_as_fresh_copies():
+    flight = SingleFlight(timeout=5)
+    release = threading.Event()
+
+    def fail():
+        raise HTTPException(status_code=404, detail="Post not found")
+
+    fn, calls = blocking(release, fail)
+    errors = asyncio.run(run_concurrently(flight, "k", fn, release, 5))
+
+    assert len(calls) == 1
+    assert all(isinstance(e, HTTPException) for e in errors)
+    assert all(e.status_code == 404 for e in errors)
+    assert all(e.detail == "Post not found" for e in errors)
+    assert len({id(e) for e in errors}) == 5
+    assert flight.errors == 1
+    assert flight.coalesced == 4
+
+
+def test_other_errors_are_chained_not_shared():
+    flight = SingleFlight(timeout=5)
+    release = threading.Event()
+
+    def fail():
+        raise ValueError("boom")
+
+    fn, _ = blocking(release, fail)
+    errors = asyncio.run(run_concurrently(flight, "k", fn, release, 20))
+
+    leader_error = errors[0]
+    assert isinstance(leader_error, ValueError)
+    followers = errors[1:]
+    assert all(isinstance(e, SingleFlightError) for e in followers)
+    assert all(e.__cause__ is leader_error for e in followers)
+    # Followers must not add their frames to the leader's traceback
+    depth = 0
+    tb = leader_error.__traceback__
+    while tb is not None:
+        depth += 1
+        tb = tb.tb_next
+    assert depth < 10
+
+
+def test_key_is_released_after_failure():
+    flight = SingleFlight(timeout=5)
+
+    def fail():
+        raise ValueError("boom")
+
+    async def main():
+        with pytest.raises(ValueError):
+            await flight.do("k", fail)
+        return await flight.do("k", lambda: "ok")
+
+    assert asyncio.run(main()) == "ok"
+    assert flight.stats()["executions"] == 2
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_waiting_is_bounded():
+    flight = SingleFlight(timeout=0.05)
+    release = threading.Event()
+    fn, _ = blocking(release, lambda: "ok")
+
+    async def main():
+        leader = asyncio.create_task(flight.do("k", fn))
+        await asyncio.sleep(0.01)
+        with pytest.raises(SingleFlightTimeout):
+            await flight.do("k", fn)
+        release.set()
+        return await leader
+
+    assert asyncio.run(main()) == "ok"
+    assert flight.timeouts == 1
+    assert flight.coalesced == 0
+
+
+def test_coalesce_timeout_returns_503(monkeypatch):
+    flight = SingleFlight(timeout=0.05)
+    monkeypatch.setattr(singleflight, "read_flight", flight)
+    release = threading.Event()
+    fn, _ = blocking(release, lambda: "ok")
+
+    async def main():
+        leader = asyncio.create_task(singleflight.coalesce("k", fn))
+        await asyncio.sleep(0.01)
+        with pytest.raises(HTTPException) as excinfo:
+            await singleflight.coalesce("k", fn)
+        release.set()
+        await leader
+        return excinfo.value
+
+    assert asyncio.run(main()).status_code == 503